@@ -4,10 +4,14 @@ import os
 import re
 import subprocess
 import sys
-from datetime import datetime
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 
-IMAGE_EXTS = {
+IMAGE_EXTS = frozenset({
     "apng",
     "avif",
     "bmp",
@@ -34,20 +38,28 @@ IMAGE_EXTS = {
     "tif",
     "tiff",
     "webp",
-}
+})
+
+# Suffixes of every extension scan() can turn into a candidate.
+CANDIDATE_SUFFIXES = tuple(f".{ext}" for ext in sorted(IMAGE_EXTS | {"zip", "json"}))
 
 DEFAULT_MIN_BYTES = 1_000_000
 
-JSON_HINT_PHRASES = {
+# History searched for last_commit/last_date: the checkout plus branches and
+# tags. Unlike --all this leaves out refs/stash, whose index commits are not
+# meaningful last changes.
+LAST_CHANGE_REFS = ("HEAD", "--branches", "--tags")
+
+JSON_HINT_PHRASES = (
     "run-history",
     "run_history",
     "runhistory",
     "export-prompt-metadata",
     "export_prompt_metadata",
     "exportpromptmetadata",
-}
+)
 
-JSON_HINT_WORDS = {
+JSON_HINT_WORDS = frozenset({
     "run",
     "history",
     "export",
@@ -58,7 +70,13 @@ JSON_HINT_WORDS = {
     "tmp",
     "temp",
     "profile",
-}
+})
+
+JSON_HINT_RE = re.compile("|".join(re.escape(phrase) for phrase in JSON_HINT_PHRASES))
+
+DIGIT_RE = re.compile(r"\d")
+
+PATH_SPLIT_RE = re.compile(r"[\\/\s_-]+")
 
 
 def run_git(args, input_text=None):
@@ -73,107 +91,193 @@ def run_git(args, input_text=None):
     return result.stdout
 
 
+def run_git_stream(args, text=True):
+    """Yield git stdout line by line instead of buffering the whole listing.
+
+    With text=False lines are raw bytes, skipping locale decoding entirely.
+    git's stderr passes through, and a failing git raises CalledProcessError.
+    """
+    newline = "\n" if text else b"\n"
+    proc = subprocess.Popen(
+        ["git"] + args,
+        text=text,
+        bufsize=1 << 20,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        for line in proc.stdout:
+            yield line.rstrip(newline)
+    except GeneratorExit:
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, proc.args)
+
+
 def repo_root():
     return run_git(["rev-parse", "--show-toplevel"]).strip()
 
 
 def load_keep_paths(path):
-    keep = []
+    """Return the keep list sorted, deduplicated and without entries under a kept directory."""
     if not path:
-        return keep
+        return ()
     p = Path(path)
     if not p.exists():
-        return keep
+        return ()
+    keep = set()
     for raw in p.read_text().splitlines():
         line = raw.strip()
         if not line or line.startswith("#"):
             continue
-        keep.append(line)
-    return keep
+        keep.add(line)
+    return collapse_keep_paths(keep)
 
 
-def is_keep_path(path, keep_paths):
-    for keep in keep_paths:
+def collapse_keep_paths(keep_paths):
+    # Sorting puts every entry under a directory prefix right after it (or
+    # after a sibling already under it), so one sweep drops the redundant ones.
+    collapsed = []
+    prefix = None
+    for keep in sorted(set(keep_paths)):
+        if prefix is not None and keep.startswith(prefix):
+            continue
+        collapsed.append(keep)
         if keep.endswith("/"):
-            if path.startswith(keep):
-                return True
-        elif path == keep:
-            return True
-    return False
+            prefix = keep
+    return tuple(collapsed)
 
 
-def is_debug_json(path):
-    lower_path = path.lower()
-    base = os.path.basename(lower_path)
-    name = base.rsplit(".", 1)[0]
+class KeepIndex(namedtuple("KeepIndex", ["exact", "prefixes"])):
+    __slots__ = ()
 
-    for phrase in JSON_HINT_PHRASES:
-        if phrase in name:
-            return True
+    @classmethod
+    def from_paths(cls, keep_paths):
+        keep_paths = collapse_keep_paths(keep_paths)
+        exact = frozenset(keep for keep in keep_paths if not keep.endswith("/"))
+        # Collapsed prefixes never nest, so bisect finds the only possible match.
+        prefixes = tuple(keep for keep in keep_paths if keep.endswith("/"))
+        return cls(exact, prefixes)
+
+
+def is_keep_path(path, keep_index):
+    if path in keep_index.exact:
+        return True
+    prefixes = keep_index.prefixes
+    idx = bisect_right(prefixes, path)
+    return idx > 0 and path.startswith(prefixes[idx - 1])
+
+
+@lru_cache(maxsize=None)
+def classify_path(path):
+    """Return (ext, json_hint) for a path, lowering and splitting it only once.
+
+    Cached because every historical version of a file repeats its path.
+    Paths that can never become candidates report an empty ext.
+    """
+    lower_path = path.lower()
+    if not lower_path.endswith(CANDIDATE_SUFFIXES):
+        return "", False
+    base = lower_path.rpartition("/")[2]
+    name, dot, ext = base.rpartition(".")
+    if not dot:
+        return "", False
+    if ext != "json":
+        return ext, False
+    return ext, is_debug_json(lower_path, name)
+
+
+def is_debug_json(lower_path, name):
+    """Heuristic for debug/run-history JSON; expects the lowered path and file stem."""
+    if JSON_HINT_RE.search(name):
+        return True
 
     if "export" in name and "prompt" in name and "metadata" in name:
         return True
 
-    if any(word in name for word in ("debug", "trace", "tmp", "temp", "profile")):
+    if "debug" in name or "trace" in name or "tmp" in name or "temp" in name or "profile" in name:
         return True
 
-    has_digits = any(ch.isdigit() for ch in name)
-    if has_digits and any(word in name for word in ("run", "history", "export", "metadata")):
+    has_digits = DIGIT_RE.search(name) is not None
+    if has_digits and ("run" in name or "history" in name or "export" in name or "metadata" in name):
         return True
 
     # Directory-level hints help catch scattered artifacts.
-    path_parts = re.split(r"[\\/\\s_-]+", lower_path)
-    if any(part in JSON_HINT_WORDS for part in path_parts):
+    path_parts = PATH_SPLIT_RE.split(lower_path)
+    if not JSON_HINT_WORDS.isdisjoint(path_parts):
         if has_digits or "run" in path_parts or "history" in path_parts:
             return True
 
     return False
 
 
-def list_object_paths():
-    output = run_git(["rev-list", "--objects", "--all"])
-    mapping = {}
-    for line in output.splitlines():
-        if not line:
-            continue
-        if " " not in line:
-            continue
-        sha, path = line.split(" ", 1)
-        if not path:
-            continue
-        mapping.setdefault(sha, set()).add(path)
-    return mapping
-
-
-def list_blob_sizes(shas):
-    sizes = {}
-    if not shas:
-        return sizes
-    payload = "\n".join(shas)
-    output = run_git(["cat-file", "--batch-check=%(objectname) %(objecttype) %(objectsize)"], input_text=payload)
-    for line in output.splitlines():
-        parts = line.split()
-        if len(parts) != 3:
-            continue
-        name, obj_type, size = parts
-        if obj_type != "blob":
-            continue
-        try:
-            sizes[name] = int(size)
-        except ValueError:
-            continue
-    return sizes
-
+def iter_object_paths(wanted):
+    """Yield (sha, path) from rev-list --objects, skipping shas not in wanted.
 
-def file_ext(path):
-    if "." not in path:
-        return ""
-    return path.rsplit(".", 1)[1].lower()
+    Shas stay as ASCII bytes (matching iter_blob_sizes); only kept paths are decoded.
+    """
+    for line in run_git_stream(["rev-list", "--objects", "--all"], text=False):
+        sha, sep, path = line.partition(b" ")
+        if not sep or not path or sha not in wanted:
+            continue
+        yield sha, path.decode("utf-8", "surrogateescape")
+
+
+def iter_blob_sizes(min_bytes=0):
+    """Yield (sha, size) for every blob of at least min_bytes, with shas as bytes."""
+    proc = subprocess.Popen(
+        [
+            "git",
+            "cat-file",
+            "--batch-check=%(objectname) %(objecttype) %(objectsize)",
+            "--batch-all-objects",
+            "--unordered",
+        ],
+        bufsize=1 << 20,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        for line in proc.stdout:
+            parts = line.split(b" ", 2)
+            if len(parts) != 3:
+                continue
+            name, obj_type, size = parts
+            if obj_type != b"blob":
+                continue
+            try:
+                size = int(size)
+            except ValueError:
+                continue
+            if size >= min_bytes:
+                yield name, size
+    except GeneratorExit:
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, proc.args)
 
 
 def git_last_change(path):
     try:
-        out = run_git(["log", "-1", "--format=%H\t%cs", "--", path]).strip()
+        out = run_git(
+            [
+                "log",
+                *LAST_CHANGE_REFS,
+                "--max-count=1",
+                "--no-renames",
+                "--format=%H%x09%cs",
+                "--",
+                path,
+            ]
+        ).strip()
     except subprocess.CalledProcessError:
         return "", ""
     if not out:
@@ -184,60 +288,112 @@ def git_last_change(path):
     return out, ""
 
 
+def git_last_changes(needed):
+    """Walk history once, newest first, recording the last commit touching each needed path.
+
+    The walk stops as soon as every needed path is resolved. Paths git cannot
+    report verbatim (e.g. quoted names) are left to the per-path
+    git_last_change fallback.
+    """
+    needed = set(needed)
+    last = {}
+    commit = ("", "")
+    if not needed:
+        return last
+    for line in run_git_stream(
+        [
+            "-c",
+            "core.quotePath=false",
+            "log",
+            *LAST_CHANGE_REFS,
+            "--format=%x00%H %cs",
+            "--name-only",
+            "--no-renames",
+        ]
+    ):
+        if not line:
+            continue
+        if line[0] == "\0":
+            sha, _, date = line[1:].partition(" ")
+            commit = (sha, date)
+            continue
+        if line in needed:
+            last[line] = commit
+            needed.discard(line)
+            if not needed:
+                break
+    return last
+
+
+def fill_last_changes(last_cache, paths):
+    """Resolve paths the batched walk missed with concurrent per-path lookups."""
+    missing = {path for path in paths if path not in last_cache}
+    if not missing:
+        return
+    # Imported lazily so apply and --help skip its startup cost.
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    # git log is I/O-bound, so oversubscribe the cores a little.
+    workers = min(32, (os.cpu_count() or 1) * 4, len(missing))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(git_last_change, path): path for path in missing}
+        for future in as_completed(futures):
+            last_cache[futures[future]] = future.result()
+
+
 def write_tsv(path, header_lines, rows):
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open("w", encoding="utf-8") as handle:
-        for line in header_lines:
-            handle.write(f"# {line}\n")
-        for row in rows:
-            handle.write("\t".join(row) + "\n")
+    lines = chain((f"# {line}" for line in header_lines), ("\t".join(row) for row in rows))
+    with p.open("w", encoding="utf-8", buffering=1 << 20) as handle:
+        handle.write("".join(f"{line}\n" for line in lines))
 
 
 def scan(args):
     root = repo_root()
-    keep_paths = load_keep_paths(args.keep_paths)
+    keep_index = KeepIndex.from_paths(load_keep_paths(args.keep_paths))
 
-    mapping = list_object_paths()
-    sizes = list_blob_sizes(mapping.keys())
+    # Size-filter first so only the (few) large blobs keep their paths.
+    big_sizes = dict(iter_blob_sizes(args.min_bytes))
 
     candidates = []
     json_review = []
 
-    for sha, paths in mapping.items():
-        size = sizes.get(sha)
-        if size is None or size < args.min_bytes:
+    for sha, path in iter_object_paths(big_sizes):
+        # Most large blobs are neither images, zips nor JSON; reject them
+        # on the (cached) extension before touching the keep index.
+        ext, hint = classify_path(path)
+        if ext in IMAGE_EXTS:
+            reason = "image"
+        elif ext == "zip":
+            reason = "zip"
+        elif ext == "json":
+            reason = "json" + ("-hint" if hint else "")
+        else:
+            continue
+        if is_keep_path(path, keep_index):
+            continue
+        size = big_sizes[sha]
+        if ext == "json" and args.json_mode == "hint" and not hint:
+            json_review.append((sha.decode(), path, size, "json"))
             continue
-        for path in paths:
-            if is_keep_path(path, keep_paths):
-                continue
-            ext = file_ext(path)
-            if ext in IMAGE_EXTS:
-                reason = "image"
-            elif ext == "zip":
-                reason = "zip"
-            elif ext == "json":
-                hint = is_debug_json(path)
-                if args.json_mode == "hint" and not hint:
-                    json_review.append((sha, path, size, "json"))
-                    continue
-                reason = "json" + ("-hint" if hint else "")
-            else:
-                continue
 
-            candidates.append((sha, path, size, reason, ext))
+        candidates.append((sha.decode(), path, size, reason, ext))
 
     candidates.sort(key=lambda row: (-row[2], row[1]))
     json_review.sort(key=lambda row: (-row[2], row[1]))
 
+    # Annotation is review metadata only; "none" and "lazy" skip the history walk here.
     last_cache = {}
+    if args.annotate == "full":
+        needed = [row[1] for row in candidates] + [row[1] for row in json_review]
+        last_cache = git_last_changes(needed)
+        fill_last_changes(last_cache, needed)
 
     def annotate(rows):
         annotated = []
         for sha, path, size, reason, ext in rows:
-            if path not in last_cache:
-                last_cache[path] = git_last_change(path)
-            last_commit, last_date = last_cache[path]
+            last_commit, last_date = last_cache.get(path, ("", ""))
             size_mb = f"{size / 1_000_000:.2f}"
             annotated.append(
                 (
@@ -256,11 +412,12 @@ def scan(args):
     candidate_rows = annotate(candidates)
 
     header = [
-        f"generated: {datetime.utcnow().isoformat()}Z",
+        f"generated: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}",
         f"repo: {root}",
         f"min_bytes: {args.min_bytes}",
         f"json_mode: {args.json_mode}",
         f"keep_paths_file: {args.keep_paths or '(none)'}",
+        f"annotate: {args.annotate}",
         "columns: size_bytes size_mb ext reason path last_commit last_date blob_sha",
         "edit this file to remove any paths you want to keep",
     ]
@@ -270,9 +427,7 @@ def scan(args):
     if args.json_mode == "hint" and json_review:
         review_rows = []
         for sha, path, size, reason in json_review:
-            if path not in last_cache:
-                last_cache[path] = git_last_change(path)
-            last_commit, last_date = last_cache[path]
+            last_commit, last_date = last_cache.get(path, ("", ""))
             size_mb = f"{size / 1_000_000:.2f}"
             review_rows.append(
                 (
@@ -298,6 +453,30 @@ def scan(args):
         print(f"Wrote {len(json_review)} large JSON review rows to {args.json_review_output}")
 
 
+def annotate_candidate_file(path, output_path, paths):
+    """Copy a lazily annotated scan to output_path, filling last_commit/last_date for surviving rows.
+
+    The curated input is only read, never rewritten.
+    """
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    if "# annotate: lazy" not in lines:
+        return
+    last_cache = git_last_changes(paths)
+    fill_last_changes(last_cache, paths)
+
+    annotated = []
+    for line in lines:
+        parts = line.split("\t")
+        if not line.startswith("#") and len(parts) >= 7 and not parts[5] and parts[4] in last_cache:
+            parts[5], parts[6] = last_cache[parts[4]]
+            line = "\t".join(parts)
+        annotated.append(line)
+    output = Path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text("\n".join(annotated) + "\n", encoding="utf-8")
+    print(f"Annotated {len(last_cache)} surviving paths in {output}")
+
+
 def parse_candidate_paths(path):
     paths = []
     for raw in Path(path).read_text().splitlines():
@@ -313,13 +492,13 @@ def parse_candidate_paths(path):
 
 
 def apply(args):
-    keep_paths = load_keep_paths(args.keep_paths)
+    keep_index = KeepIndex.from_paths(load_keep_paths(args.keep_paths))
     candidate_paths = parse_candidate_paths(args.input)
 
     deduped = []
     seen = set()
     for path in candidate_paths:
-        if is_keep_path(path, keep_paths):
+        if is_keep_path(path, keep_index):
             continue
         if path in seen:
             continue
@@ -330,6 +509,8 @@ def apply(args):
         print("No paths to purge after applying keep list.")
         return
 
+    annotate_candidate_file(args.input, args.annotated_output, deduped)
+
     output_paths_file = Path(args.paths_output)
     output_paths_file.parent.mkdir(parents=True, exist_ok=True)
     output_paths_file.write_text("\n".join(deduped) + "\n")
@@ -362,6 +543,13 @@ def main():
     scan_parser = subparsers.add_parser("scan", help="Generate candidate purge list")
     scan_parser.add_argument("--min-bytes", type=int, default=DEFAULT_MIN_BYTES)
     scan_parser.add_argument("--json-mode", choices=["hint", "all"], default="hint")
+    scan_parser.add_argument(
+        "--annotate",
+        choices=["full", "none", "lazy"],
+        default="full",
+        help="Resolve last_commit/last_date now (full), never (none), or in apply for surviving rows (lazy); "
+        "lazy apply writes them to apply's --annotated-output",
+    )
     scan_parser.add_argument(
         "--output",
         default="history/purge_candidates.tsv",
@@ -385,6 +573,11 @@ def main():
         default="history/purge_candidates.tsv",
         help="Curated candidate file",
     )
+    apply_parser.add_argument(
+        "--annotated-output",
+        default="history/purge_candidates.annotated.tsv",
+        help="Where to write the input with last_commit/last_date filled in (lazy scans only; input is left as is)",
+    )
     apply_parser.add_argument(
         "--paths-output",
         default="history/purge_paths.txt",
@@ -4,25 +4,69 @@
 import argparse
 import json
 import math
-import random
-import statistics
+import os
 import sys
 from collections import Counter, defaultdict
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
 
 try:
-    import networkx as nx
-    from networkx.algorithms.community import greedy_modularity_communities
-    from networkx.algorithms.community.quality import modularity
+    import igraph as ig
 except Exception:  # pragma: no cover - runtime dependency guard
-    nx = None
-    greedy_modularity_communities = None
-    modularity = None
+    ig = None
+
+try:
+    import numpy as np
+    from scipy import sparse
+    from scipy.sparse import csgraph
+except Exception:  # pragma: no cover - runtime dependency guard
+    np = None
+    sparse = None
+    csgraph = None
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional accelerator
+    orjson = None
+
+try:
+    from numba import njit, prange
+except Exception:  # pragma: no cover - optional accelerator
+    njit = None
+    prange = range
+
+# Upper bound on the packed rows gathered per Jaccard batch.
+JACCARD_BATCH_BYTES = 1 << 25
+
+# Upper bound on the distance-matrix rows held per all-pairs BFS block.
+DISTANCE_BATCH_BYTES = 1 << 25
+
+# Below this many pairs numba's JIT start-up costs more than it saves.
+NUMBA_MIN_PAIRS = 1_000_000
+
+# HyperLogLog registers per node for --approximate-locality (2**11 bytes, ~2%
+# standard error). Must stay >= 11 so the 64 - p rank bits fit a float64 exactly.
+HLL_PRECISION = 11
+
+# One-permutation MinHash bins per node for --approximate-locality overlap
+# (uint32 minima, 2**8 * 4 bytes). Must stay a power of two <= 2**32.
+MINHASH_BINS = 1 << 8
+MINHASH_EMPTY = 0xFFFFFFFF
+
+POPCOUNT8 = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8) if np is not None else None
 
 
 def load_json(path: str) -> Any:
-    with open(path, "r", encoding="utf-8") as handle:
-        return json.load(handle)
+    if orjson is None:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    with open(path, "rb") as handle:
+        data = handle.read()
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson is stricter than json (e.g. NaN/Infinity); never reject what json accepts.
+        return json.loads(data)
 
 
 def select_entity_kind(entity: Dict[str, Any], fallback: str = "unknown") -> str:
@@ -43,8 +87,29 @@ def extract_entities(world_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     raise ValueError("Could not find entities (hardState/entities/nodes) in world data.")
 
 
-def derive_relationships_from_entities(entities: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    relationships: List[Dict[str, Any]] = []
+class Relationship(NamedTuple):
+    """One src -> dst edge; relationships are normalized to this once after extraction."""
+
+    src: Any
+    dst: Any
+    kind: Any
+
+
+def normalize_relationships(relationships: Iterable[Dict[str, Any]]) -> List[Relationship]:
+    """Freeze relationship dicts into Relationship tuples, dropping any without both endpoints."""
+    normalized: List[Relationship] = []
+    for rel in relationships:
+        src = rel.get("src")
+        dst = rel.get("dst")
+        if src and dst:
+            normalized.append(Relationship(src, dst, rel.get("kind")))
+    return normalized
+
+
+def derive_relationships_from_entities(entities: Sequence[Dict[str, Any]]) -> List[Relationship]:
+    relationships: List[Relationship] = []
+    # Entities share a handful of key layouts; filter each layout's keys once.
+    relationship_keys_by_shape: Dict[Tuple[str, ...], List[str]] = {}
     for entity in entities:
         src = entity.get("id")
         if not src:
@@ -57,10 +122,14 @@ def derive_relationships_from_entities(entities: Sequence[Dict[str, Any]]) -> Li
                     dst = link.get("dst") or link.get("target") or link.get("id")
                     kind = link.get("kind") or link.get("type") or link.get("relationship")
                     if src and dst and kind:
-                        relationships.append({"src": src, "dst": dst, "kind": kind})
-        for key, value in entity.items():
-            if not key.startswith("relationship"):
-                continue
+                        relationships.append(Relationship(src, dst, kind))
+        shape = tuple(entity)
+        relationship_keys = relationship_keys_by_shape.get(shape)
+        if relationship_keys is None:
+            relationship_keys = [key for key in shape if key.startswith("relationship")]
+            relationship_keys_by_shape[shape] = relationship_keys
+        for key in relationship_keys:
+            value = entity[key]
             if value is None:
                 continue
             dests = value if isinstance(value, list) else [value]
@@ -68,49 +137,50 @@ def derive_relationships_from_entities(entities: Sequence[Dict[str, Any]]) -> Li
                 if isinstance(dst, dict):
                     dst = dst.get("id") or dst.get("dst") or dst.get("target")
                 if src and dst:
-                    relationships.append({"src": src, "dst": dst, "kind": key})
+                    relationships.append(Relationship(src, dst, key))
     return relationships
 
 
-def extract_relationships(world_data: Dict[str, Any], entities: Sequence[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], str]:
+def extract_relationships(
+    world_data: Dict[str, Any], entities: Sequence[Dict[str, Any]]
+) -> Tuple[List[Relationship], str, int]:
+    """Relationships, where they came from, and how many records the source listed.
+
+    The count includes records normalization drops for a missing endpoint.
+    """
     relationships = world_data.get("relationships")
     if relationships:
-        return list(relationships), "worldData.relationships"
+        return normalize_relationships(relationships), "worldData.relationships", len(relationships)
     relationships = world_data.get("edges")
     if relationships:
-        return list(relationships), "worldData.edges"
+        return normalize_relationships(relationships), "worldData.edges", len(relationships)
     derived = derive_relationships_from_entities(entities)
     if derived:
-        return derived, "derived-from-entities"
+        return derived, "derived-from-entities", len(derived)
     raise ValueError("Could not find relationships (relationships/edges) or derive from entities.")
 
 
 def build_histogram(values: Sequence[int], bins: int) -> List[Dict[str, int]]:
-    if bins <= 0 or not values:
+    if bins <= 0 or len(values) == 0:
         return []
-    min_value = min(values)
-    max_value = max(values)
+    arr = np.asarray(values, dtype=np.int64)
+    min_value = int(arr.min())
+    max_value = int(arr.max())
     if min_value == max_value:
-        return [{"min": min_value, "max": max_value, "count": len(values)}]
+        return [{"min": min_value, "max": max_value, "count": int(arr.size)}]
     span = max_value - min_value + 1
     bins = min(bins, span)
-    counts = [0 for _ in range(bins)]
-    for value in values:
-        index = (value - min_value) * bins // span
-        if index >= bins:
-            index = bins - 1
-        counts[index] += 1
-    edges = [min_value + (idx * span) // bins for idx in range(bins)] + [max_value + 1]
-    histogram = []
-    for idx, count in enumerate(counts):
-        start = edges[idx]
-        end = edges[idx + 1] - 1
-        histogram.append({"min": start, "max": end, "count": count})
-    return histogram
+    indices = np.minimum((arr - min_value) * bins // span, bins - 1)
+    counts = np.bincount(indices, minlength=bins).tolist()
+    edges = (min_value + np.arange(bins + 1, dtype=np.int64) * span // bins).tolist()
+    return [
+        {"min": edges[idx], "max": edges[idx + 1] - 1, "count": count}
+        for idx, count in enumerate(counts)
+    ]
 
 
 def summarize_values(values: Sequence[int], histogram_bins: int) -> Dict[str, Any]:
-    if not values:
+    if len(values) == 0:
         return {
             "count": 0,
             "min": None,
@@ -119,20 +189,19 @@ def summarize_values(values: Sequence[int], histogram_bins: int) -> Dict[str, An
             "std": None,
             "histogram": [],
         }
-    mean = statistics.mean(values)
-    std = statistics.pstdev(values) if len(values) > 1 else 0.0
+    arr = np.asarray(values, dtype=np.int64)
     return {
-        "count": len(values),
-        "min": min(values),
-        "max": max(values),
-        "mean": mean,
-        "std": std,
-        "histogram": build_histogram(values, histogram_bins),
+        "count": int(arr.size),
+        "min": int(arr.min()),
+        "max": int(arr.max()),
+        "mean": float(arr.mean()),
+        "std": float(arr.std()) if arr.size > 1 else 0.0,
+        "histogram": build_histogram(arr, histogram_bins),
     }
 
 
 def summarize_numeric(values: Sequence[float]) -> Dict[str, Any]:
-    if not values:
+    if len(values) == 0:
         return {
             "count": 0,
             "min": None,
@@ -140,88 +209,106 @@ def summarize_numeric(values: Sequence[float]) -> Dict[str, Any]:
             "mean": None,
             "std": None,
         }
-    mean = statistics.mean(values)
-    std = statistics.pstdev(values) if len(values) > 1 else 0.0
+    arr = np.asarray(values, dtype=np.float64)
     return {
-        "count": len(values),
-        "min": min(values),
-        "max": max(values),
-        "mean": mean,
-        "std": std,
+        "count": int(arr.size),
+        "min": float(arr.min()),
+        "max": float(arr.max()),
+        "mean": float(arr.mean()),
+        "std": float(arr.std()) if arr.size > 1 else 0.0,
     }
 
 
-def add_edge_info(edge: Dict[str, Any], edges_by_src: Dict[str, List[Dict[str, Any]]], edges_by_dst: Dict[str, List[Dict[str, Any]]]) -> None:
-    src = edge.get("src")
-    dst = edge.get("dst")
-    if not src or not dst:
-        return
-    edges_by_src[src].append(edge)
-    edges_by_dst[dst].append(edge)
+class EdgeTable(NamedTuple):
+    """Relationships factorized into parallel int columns, shared by every metric pass."""
+
+    node_ids: List[str]
+    src: Any
+    dst: Any
+    kind: Any
+    kind_count: int
+
+
+def factorize_relationships(
+    entity_kind: Dict[str, str],
+    relationships: Sequence[Relationship],
+) -> EdgeTable:
+    if np is None:
+        raise RuntimeError("numpy is required to index relationships.")
+    # Node indices follow entity_kind's order; endpoints missing from it get
+    # trailing indices.
+    index = {entity_id: idx for idx, entity_id in enumerate(entity_kind)}
+    kind_codes: Dict[Any, int] = {}
+    src_list: List[int] = []
+    dst_list: List[int] = []
+    kind_list: List[int] = []
+    for src, dst, kind in relationships:
+        src_list.append(index.setdefault(src, len(index)))
+        dst_list.append(index.setdefault(dst, len(index)))
+        kind_list.append(-1 if kind is None else kind_codes.setdefault(kind, len(kind_codes)))
+    return EdgeTable(
+        node_ids=list(index),
+        src=np.array(src_list, dtype=np.int64),
+        dst=np.array(dst_list, dtype=np.int64),
+        kind=np.array(kind_list, dtype=np.int64),
+        kind_count=len(kind_codes),
+    )
+
+
+def count_unique_pairs(left: Any, right: Any, width: int, node_total: int) -> Any:
+    """Per left index, count distinct right values (both int arrays, right < width)."""
+    codes = np.unique(left * width + right)
+    return np.bincount(codes // width, minlength=node_total)
 
 
 def compute_connection_metrics(
     entity_kind: Dict[str, str],
-    relationships: Sequence[Dict[str, Any]],
+    edges: EdgeTable,
     histogram_bins: int,
 ) -> Dict[str, Any]:
-    edges_by_src: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-    edges_by_dst: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-    for rel in relationships:
-        add_edge_info(rel, edges_by_src, edges_by_dst)
-
-    metrics_by_entity: Dict[str, Dict[str, int]] = {}
-    for entity_id in entity_kind:
-        out_edges = edges_by_src.get(entity_id, [])
-        in_edges = edges_by_dst.get(entity_id, [])
-        unique_destinations = {edge.get("dst") for edge in out_edges if edge.get("dst")}
-        unique_sources = {edge.get("src") for edge in in_edges if edge.get("src")}
-        neighbors = unique_destinations | unique_sources
-        unique_relationships = {
-            edge.get("kind")
-            for edge in out_edges + in_edges
-            if edge.get("kind") is not None
-        }
-        metrics_by_entity[entity_id] = {
-            "unique_relationship_kinds": len(unique_relationships),
-            "unique_destinations": len(unique_destinations),
-            "unique_neighbors": len(neighbors),
-        }
+    node_total = len(edges.node_ids)
+    src_arr = edges.src
+    dst_arr = edges.dst
+    kind_arr = edges.kind
+    has_kind = kind_arr >= 0
+
+    unique_destinations = count_unique_pairs(src_arr, dst_arr, node_total, node_total)
+    unique_neighbors = count_unique_pairs(
+        np.concatenate([src_arr, dst_arr]),
+        np.concatenate([dst_arr, src_arr]),
+        node_total,
+        node_total,
+    )
+    unique_kinds = count_unique_pairs(
+        np.concatenate([src_arr[has_kind], dst_arr[has_kind]]),
+        np.concatenate([kind_arr[has_kind], kind_arr[has_kind]]),
+        max(edges.kind_count, 1),
+        node_total,
+    )
 
+    # The first len(entity_kind) node indices follow entity_kind's order.
+    entity_total = len(entity_kind)
+    metric_arrays = {
+        "unique_relationship_kinds": unique_kinds[:entity_total],
+        "unique_destinations": unique_destinations[:entity_total],
+        "unique_neighbors": unique_neighbors[:entity_total],
+    }
     overall = {
-        "unique_relationship_kinds": summarize_values(
-            [metrics["unique_relationship_kinds"] for metrics in metrics_by_entity.values()],
-            histogram_bins,
-        ),
-        "unique_destinations": summarize_values(
-            [metrics["unique_destinations"] for metrics in metrics_by_entity.values()],
-            histogram_bins,
-        ),
-        "unique_neighbors": summarize_values(
-            [metrics["unique_neighbors"] for metrics in metrics_by_entity.values()],
-            histogram_bins,
-        ),
+        name: summarize_values(values, histogram_bins) for name, values in metric_arrays.items()
     }
 
+    type_codes: Dict[str, int] = {}
+    type_idx = np.fromiter(
+        (type_codes.setdefault(kind, len(type_codes)) for kind in entity_kind.values()),
+        dtype=np.int64,
+        count=entity_total,
+    )
     by_type: Dict[str, Dict[str, Any]] = {}
-    type_to_entities: Dict[str, List[str]] = defaultdict(list)
-    for entity_id, kind in entity_kind.items():
-        type_to_entities[kind].append(entity_id)
-
-    for kind, ids in type_to_entities.items():
+    for kind, code in type_codes.items():
+        mask = type_idx == code
         by_type[kind] = {
-            "unique_relationship_kinds": summarize_values(
-                [metrics_by_entity[eid]["unique_relationship_kinds"] for eid in ids],
-                histogram_bins,
-            ),
-            "unique_destinations": summarize_values(
-                [metrics_by_entity[eid]["unique_destinations"] for eid in ids],
-                histogram_bins,
-            ),
-            "unique_neighbors": summarize_values(
-                [metrics_by_entity[eid]["unique_neighbors"] for eid in ids],
-                histogram_bins,
-            ),
+            name: summarize_values(values[mask], histogram_bins)
+            for name, values in metric_arrays.items()
         }
 
     return {
@@ -230,15 +317,13 @@ def compute_connection_metrics(
     }
 
 
-def weighted_avg_shortest_path(components: Iterable[Any]) -> Optional[float]:
+def weighted_avg_shortest_path(component_paths: Iterable[Tuple[int, Optional[float]]]) -> Optional[float]:
     total_pairs = 0
     total_distance = 0.0
-    for comp in components:
-        node_count = comp.number_of_nodes()
-        if node_count < 2:
+    for node_count, avg_distance in component_paths:
+        if node_count < 2 or avg_distance is None:
             continue
         pairs = node_count * (node_count - 1) / 2
-        avg_distance = nx.average_shortest_path_length(comp)
         total_pairs += pairs
         total_distance += avg_distance * pairs
     if total_pairs == 0:
@@ -246,43 +331,65 @@ def weighted_avg_shortest_path(components: Iterable[Any]) -> Optional[float]:
     return total_distance / total_pairs
 
 
+def component_distance_stats(comp: Any) -> Tuple[float, int, float]:
+    """Average distance, diameter and sum of inverse distances of a connected graph.
+
+    Runs one unweighted all-pairs BFS in row blocks of at most
+    DISTANCE_BATCH_BYTES, so every metric comes from the same distances.
+    """
+    node_count = comp.vcount()
+    adjacency = build_csr(comp)
+    block = max(1, DISTANCE_BATCH_BYTES // (8 * node_count))
+    total_distance = 0.0
+    inverse_total = 0.0
+    diameter = 0
+    for start in range(0, node_count, block):
+        sources = np.arange(start, min(start + block, node_count))
+        dist = csgraph.shortest_path(adjacency, directed=False, unweighted=True, indices=sources)
+        total_distance += float(dist.sum())
+        diameter = max(diameter, int(dist.max()))
+        inverse_total += float(np.reciprocal(dist[dist > 0]).sum())
+    return total_distance / (node_count * (node_count - 1)), diameter, inverse_total
+
+
 def compute_cluster_metrics(
-    graph: Any,
-    entity_kind: Dict[str, str],
+    cluster_graph: Any,
     ignore_kinds: Sequence[str],
 ) -> Dict[str, Any]:
-    if nx is None:
-        raise RuntimeError("networkx is required to compute cluster metrics.")
-
-    nodes_to_remove = [node for node, kind in entity_kind.items() if kind in ignore_kinds]
-    cluster_graph = graph.copy()
-    cluster_graph.remove_nodes_from(nodes_to_remove)
+    """Cluster metrics for a graph already filtered by build_graph(ignore_kinds=...)."""
+    if ig is None:
+        raise RuntimeError("igraph is required to compute cluster metrics.")
 
-    components = [cluster_graph.subgraph(nodes).copy() for nodes in nx.connected_components(cluster_graph)]
+    total_nodes = cluster_graph.vcount()
+    total_edges = cluster_graph.ecount()
+    components = cluster_graph.connected_components().subgraphs()
     component_summaries = []
+    component_paths: List[Tuple[int, Optional[float]]] = []
+    inverse_distance_total = 0.0
     for comp in components:
-        node_count = comp.number_of_nodes()
-        edge_count = comp.number_of_edges()
+        node_count = comp.vcount()
+        edge_count = comp.ecount()
         if node_count > 1:
-            avg_distance = nx.average_shortest_path_length(comp)
-            diameter = nx.diameter(comp)
+            avg_distance, diameter, inverse_total = component_distance_stats(comp)
+            inverse_distance_total += inverse_total
         else:
             avg_distance = None
             diameter = None
+        component_paths.append((node_count, avg_distance))
         component_summaries.append(
             {
                 "node_count": node_count,
                 "edge_count": edge_count,
-                "density": nx.density(comp) if node_count > 1 else 0.0,
+                "density": comp.density() if node_count > 1 else 0.0,
                 "avg_shortest_path_length": avg_distance,
                 "diameter": diameter,
-                "avg_clustering": nx.average_clustering(comp) if node_count > 1 else 0.0,
+                "avg_clustering": comp.transitivity_avglocal_undirected(mode="zero") if node_count > 1 else 0.0,
             }
         )
 
-    component_sizes = [comp.number_of_nodes() for comp in components]
+    component_sizes = [size for size, _ in component_paths]
     largest_component_size = max(component_sizes) if component_sizes else 0
-    avg_distance_weighted = weighted_avg_shortest_path(components)
+    avg_distance_weighted = weighted_avg_shortest_path(component_paths)
 
     community_summary: Dict[str, Any] = {
         "count": None,
@@ -291,63 +398,259 @@ def compute_cluster_metrics(
         "inter_community_edge_ratio": None,
         "avg_community_density": None,
     }
-    if cluster_graph.number_of_nodes() > 0 and cluster_graph.number_of_edges() > 0:
-        if greedy_modularity_communities and modularity:
-            communities = list(greedy_modularity_communities(cluster_graph))
-            if communities:
-                community_summary["count"] = len(communities)
-                community_summary["sizes"] = [len(comm) for comm in communities]
-                community_summary["modularity"] = modularity(cluster_graph, communities)
-                node_to_comm: Dict[str, int] = {}
-                for idx, comm in enumerate(communities):
-                    for node in comm:
-                        node_to_comm[node] = idx
-                inter_edges = sum(
-                    1
-                    for u, v in cluster_graph.edges()
-                    if node_to_comm.get(u) != node_to_comm.get(v)
-                )
-                total_edges = cluster_graph.number_of_edges()
-                community_summary["inter_community_edge_ratio"] = (
-                    inter_edges / total_edges if total_edges else None
-                )
-                densities = []
-                for comm in communities:
-                    sub = cluster_graph.subgraph(comm)
-                    densities.append(nx.density(sub) if sub.number_of_nodes() > 1 else 0.0)
-                community_summary["avg_community_density"] = (
-                    statistics.mean(densities) if densities else None
-                )
+    if total_nodes > 0 and total_edges > 0:
+        # Fast-greedy is igraph's Clauset-Newman-Moore, the same greedy
+        # modularity maximisation networkx implemented.
+        clustering = cluster_graph.community_fastgreedy().as_clustering()
+        communities = sorted(clustering, key=len, reverse=True)
+        if communities:
+            community_summary["count"] = len(communities)
+            community_summary["sizes"] = [len(comm) for comm in communities]
+            community_summary["modularity"] = cluster_graph.modularity(clustering.membership)
+            # One pass over the edge list yields intra-community edge counts;
+            # inter-community edges and per-community densities follow from them.
+            membership = np.asarray(clustering.membership, dtype=np.int64)
+            edge_array = np.asarray(cluster_graph.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+            src_comm = membership[edge_array[:, 0]]
+            same = src_comm == membership[edge_array[:, 1]]
+            intra = np.bincount(src_comm[same], minlength=len(clustering))
+            sizes = np.bincount(membership, minlength=len(clustering))
+            inter_edges = total_edges - int(intra.sum())
+            community_summary["inter_community_edge_ratio"] = inter_edges / total_edges
+            pair_counts = sizes * (sizes - 1) / 2
+            densities = np.divide(
+                intra, pair_counts, out=np.zeros(len(sizes), dtype=np.float64), where=sizes > 1
+            )
+            community_summary["avg_community_density"] = float(densities.mean())
+
+    global_efficiency = None
+    if total_nodes > 1:
+        # Unreachable pairs contribute zero, so the per-component sums suffice.
+        global_efficiency = inverse_distance_total / (total_nodes * (total_nodes - 1))
 
     return {
         "ignored_entity_kinds": list(ignore_kinds),
-        "node_count": cluster_graph.number_of_nodes(),
-        "edge_count": cluster_graph.number_of_edges(),
+        "node_count": total_nodes,
+        "edge_count": total_edges,
         "component_count": len(components),
         "component_sizes": component_sizes,
         "largest_component_size": largest_component_size,
         "avg_shortest_path_length_weighted": avg_distance_weighted,
-        "avg_clustering": nx.average_clustering(cluster_graph) if cluster_graph.number_of_nodes() > 1 else 0.0,
-        "global_efficiency": nx.global_efficiency(cluster_graph) if cluster_graph.number_of_nodes() > 1 else None,
+        "avg_clustering": cluster_graph.transitivity_avglocal_undirected(mode="zero") if total_nodes > 1 else 0.0,
+        "global_efficiency": global_efficiency,
         "components": component_summaries,
         "communities": community_summary,
     }
 
 
-def update_running_stats(count: int, mean: float, m2: float, value: float) -> Tuple[int, float, float]:
-    count += 1
-    delta = value - mean
-    mean += delta / count
-    m2 += delta * (value - mean)
-    return count, mean, m2
+def update_running_stats(count: int, mean: float, m2: float, values: Any) -> Tuple[int, float, float]:
+    """Fold a batch of values into running (count, mean, M2) with Chan's parallel update."""
+    batch_count = int(values.size)
+    if batch_count == 0:
+        return count, mean, m2
+    batch_mean = float(values.mean())
+    batch_m2 = float(np.square(values - batch_mean).sum())
+    total = count + batch_count
+    delta = batch_mean - mean
+    mean += delta * batch_count / total
+    m2 += batch_m2 + delta * delta * count * batch_count / total
+    return total, mean, m2
+
+
+def pack_bitsets(reach: Any) -> Any:
+    """Pack each CSR row into a uint64 bit vector: bit j of row i is set when j is in row i."""
+    node_count = reach.shape[0]
+    words = max((node_count + 63) // 64, 1)
+    bitsets = np.zeros((node_count, words), dtype=np.uint64)
+    rows = np.repeat(np.arange(node_count, dtype=np.int64), np.diff(reach.indptr))
+    cols = reach.indices.astype(np.int64)
+    bits = np.left_shift(np.uint64(1), (cols & 63).astype(np.uint64))
+    np.bitwise_or.at(bitsets, (rows, cols >> 6), bits)
+    return bitsets
+
+
+def popcount_rows(words: Any) -> Any:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return POPCOUNT8[words.view(np.uint8)].sum(axis=1, dtype=np.int64)
+
+
+def jaccard_values(left: Any, right: Any) -> Any:
+    """Row-wise Jaccard index of two stacks of packed bitsets (0.0 for empty unions)."""
+    inter = popcount_rows(left & right)
+    union = popcount_rows(left | right)
+    return np.divide(inter, union, out=np.zeros(inter.size), where=union > 0)
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def popcount64(value):  # pragma: no cover - compiled
+        value = value - ((value >> np.uint64(1)) & np.uint64(0x5555555555555555))
+        value = (value & np.uint64(0x3333333333333333)) + ((value >> np.uint64(2)) & np.uint64(0x3333333333333333))
+        value = (value + (value >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+        return (value * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+    @njit(parallel=True, cache=True)
+    def jaccard_kernel(bitsets, rows, left, right):  # pragma: no cover - compiled
+        """Per-pair Jaccard straight from the bitset rows, without gathering copies."""
+        out = np.empty(left.size)
+        words = bitsets.shape[1]
+        for k in prange(left.size):
+            a = bitsets[rows[left[k]]]
+            b = bitsets[rows[right[k]]]
+            inter = 0
+            union = 0
+            for w in range(words):
+                inter += popcount64(a[w] & b[w])
+                union += popcount64(a[w] | b[w])
+            out[k] = inter / union if union else 0.0
+        return out
+
+else:
+    jaccard_kernel = None
+
+
+def node_hashes(node_count: int) -> Any:
+    """splitmix64 hash of each node id, shared by the HyperLogLog and MinHash sketches."""
+    value = np.arange(1, node_count + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    value = (value ^ (value >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    value = (value ^ (value >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    value ^= value >> np.uint64(31)
+    return value
+
+
+def hll_slots(node_count: int) -> Tuple[Any, Any]:
+    """Register index and rank (leading zeros + 1) of each node id's hash."""
+    value = node_hashes(node_count)
+    rank_bits = 64 - HLL_PRECISION
+    index = (value >> np.uint64(rank_bits)).astype(np.int64)
+    remainder = (value & np.uint64((1 << rank_bits) - 1)).astype(np.float64)
+    rank = (rank_bits + 1 - np.frexp(remainder)[1]).astype(np.uint8)
+    return index, rank
+
+
+def minhash_slots(node_count: int) -> Tuple[Any, Any]:
+    """MinHash bin (low hash bits) and uint32 value (high hash bits) of each node id."""
+    value = node_hashes(node_count)
+    index = (value & np.uint64(MINHASH_BINS - 1)).astype(np.int64)
+    return index, (value >> np.uint64(32)).astype(np.uint32)
+
+
+def two_hop_registers(adjacency: Any, index: Any, value: Any, width: int, empty: Any, combine: Any) -> Any:
+    """Per-node registers over each node's closed two-hop set (the node itself included).
+
+    Each node writes value into register index (< width); combine (np.maximum or
+    np.minimum) merges registers, so row v is the combine over v's
+    neighbours u of the registers of u's closed neighbourhood. Nothing
+    quadratic is built. Because v is in every neighbour's closed
+    neighbourhood, v counts towards its own row whenever it has a neighbour.
+    """
+    node_count = adjacency.shape[0]
+    dtype = value.dtype
+    rows = np.repeat(np.arange(node_count, dtype=np.int64), np.diff(adjacency.indptr))
+    cols = adjacency.indices.astype(np.int64)
+
+    closed = np.full((node_count, width), empty, dtype=dtype)
+    closed[np.arange(node_count), index] = value
+    combine.at(closed, (rows, index[cols]), value[cols])
+
+    registers = np.full((node_count, width), empty, dtype=dtype)
+    block = max(1, JACCARD_BATCH_BYTES // (width * dtype.itemsize))
+    for start in range(0, cols.size, block):
+        block_rows = rows[start:start + block]
+        starts = np.flatnonzero(np.r_[True, block_rows[1:] != block_rows[:-1]])
+        targets = block_rows[starts]
+        merged = combine.reduceat(closed[cols[start:start + block]], starts, axis=0)
+        registers[targets] = combine(registers[targets], merged)
+    return registers
+
+
+def two_hop_sketches(adjacency: Any) -> Any:
+    """HyperLogLog registers of each node's closed two-hop set (see two_hop_registers)."""
+    index, rank = hll_slots(adjacency.shape[0])
+    return two_hop_registers(adjacency, index, rank, 1 << HLL_PRECISION, 0, np.maximum)
+
+
+def two_hop_minhashes(adjacency: Any) -> Any:
+    """One-permutation MinHash signatures of each node's closed two-hop set (see two_hop_registers)."""
+    index, value = minhash_slots(adjacency.shape[0])
+    return two_hop_registers(adjacency, index, value, MINHASH_BINS, MINHASH_EMPTY, np.minimum)
+
+
+def hll_estimate(registers: Any) -> Any:
+    """Cardinality estimate per row of HyperLogLog registers (linear counting when small)."""
+    width = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / width)
+    raw = alpha * width * width / np.ldexp(1.0, -registers.astype(np.int64)).sum(axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    small = (raw <= 2.5 * width) & (zeros > 0)
+    linear = width * np.log(width / np.maximum(zeros, 1))
+    return np.where(small, linear, raw)
+
+
+def minhash_jaccard_values(left: Any, right: Any) -> Any:
+    """Row-wise Jaccard estimate of two signature stacks: matching bins over bins either set fills."""
+    filled = (left != MINHASH_EMPTY) | (right != MINHASH_EMPTY)
+    matches = ((left == right) & filled).sum(axis=1)
+    union = filled.sum(axis=1)
+    return np.divide(matches, union, out=np.zeros(union.size), where=union > 0)
+
+
+def iter_all_pair_batches(node_count: int, batch: int) -> Iterable[Tuple[Any, Any]]:
+    """Every (i, j) with i < j as position arrays, roughly batch pairs at a time."""
+    lefts: List[Any] = []
+    rights: List[Any] = []
+    pending = 0
+    for i in range(node_count - 1):
+        for start in range(i + 1, node_count, batch):
+            right = np.arange(start, min(start + batch, node_count), dtype=np.int64)
+            lefts.append(np.full(right.size, i, dtype=np.int64))
+            rights.append(right)
+            pending += right.size
+            if pending >= batch:
+                yield np.concatenate(lefts), np.concatenate(rights)
+                lefts, rights, pending = [], [], 0
+    if pending:
+        yield np.concatenate(lefts), np.concatenate(rights)
+
+
+def iter_sampled_pair_batches(
+    rng: Any,
+    node_count: int,
+    sample_size: int,
+    batch: int,
+) -> Iterable[Tuple[Any, Any]]:
+    """Random distinct-position pairs (with replacement) as arrays, batch at a time."""
+    remaining = sample_size
+    while remaining > 0:
+        size = min(batch, remaining)
+        left = rng.integers(0, node_count, size=size, dtype=np.int64)
+        right = rng.integers(0, node_count - 1, size=size, dtype=np.int64)
+        right += right >= left
+        yield left, right
+        remaining -= size
+
+
+def uses_jaccard_kernel(node_count: int, max_pairs: int, approximate: bool) -> bool:
+    """Whether compute_jaccard_summary will score this many nodes with the numba kernel."""
+    total_pairs = node_count * (node_count - 1) // 2
+    sample_size = total_pairs if max_pairs <= 0 else min(total_pairs, max_pairs)
+    return jaccard_kernel is not None and not approximate and sample_size >= NUMBA_MIN_PAIRS
 
 
 def compute_jaccard_summary(
-    nodes: Sequence[str],
-    neighbor_sets: Dict[str, set],
+    nodes: Sequence[int],
+    bitsets: Any,
     max_pairs: int,
     seed: int,
+    approximate: bool = False,
 ) -> Dict[str, Any]:
+    """Jaccard overlap of the neighbour sets packed in bitsets, over pairs of the given rows.
+
+    With approximate=True, bitsets holds one-permutation MinHash signatures
+    instead, whose per-pair estimates are unbiased and stay within [0, 1].
+    """
     node_count = len(nodes)
     total_pairs = node_count * (node_count - 1) // 2
     if total_pairs == 0:
@@ -360,40 +663,31 @@ def compute_jaccard_summary(
             "std_jaccard": None,
         }
 
+    # Pairs are scored a batch at a time so each numpy call covers many pairs
+    # while the gathered rows stay within JACCARD_BATCH_BYTES.
+    batch = max(1, JACCARD_BATCH_BYTES // (bitsets.shape[1] * 8 * 2))
     if max_pairs <= 0 or total_pairs <= max_pairs:
-        pair_iter = (
-            (nodes[i], nodes[j])
-            for i in range(node_count)
-            for j in range(i + 1, node_count)
-        )
+        pair_batches = iter_all_pair_batches(node_count, batch)
         sample_size = total_pairs
         sampled = False
     else:
-        rng = random.Random(seed)
         sample_size = max_pairs
         sampled = True
+        pair_batches = iter_sampled_pair_batches(np.random.default_rng(seed), node_count, sample_size, batch)
 
-        def pair_iter() -> Iterable[Tuple[str, str]]:
-            for _ in range(sample_size):
-                i = rng.randrange(node_count)
-                j = rng.randrange(node_count - 1)
-                if j >= i:
-                    j += 1
-                yield nodes[i], nodes[j]
-        pair_iter = pair_iter()
-
+    rows = np.asarray(nodes, dtype=np.int64)
+    use_kernel = uses_jaccard_kernel(node_count, max_pairs, approximate)
     count = 0
     mean = 0.0
     m2 = 0.0
-    for left, right in pair_iter:
-        left_set = neighbor_sets[left]
-        right_set = neighbor_sets[right]
-        union_size = len(left_set | right_set)
-        if union_size == 0:
-            value = 0.0
+    for left, right in pair_batches:
+        if use_kernel:
+            values = jaccard_kernel(bitsets, rows, left, right)
+        elif approximate:
+            values = minhash_jaccard_values(bitsets[rows[left]], bitsets[rows[right]])
         else:
-            value = len(left_set & right_set) / union_size
-        count, mean, m2 = update_running_stats(count, mean, m2, value)
+            values = jaccard_values(bitsets[rows[left]], bitsets[rows[right]])
+        count, mean, m2 = update_running_stats(count, mean, m2, values)
 
     std = math.sqrt(m2 / count) if count > 0 else None
     return {
@@ -407,25 +701,26 @@ def compute_jaccard_summary(
 
 
 def compute_locality_metrics(
-    graph: Any,
+    locality_graph: Any,
     entity_kind: Dict[str, str],
     ignore_kinds: Sequence[str],
     histogram_bins: int,
     overlap_max_pairs: int,
     overlap_seed: int,
+    approximate: bool = False,
 ) -> Dict[str, Any]:
-    if nx is None:
-        raise RuntimeError("networkx is required to compute locality metrics.")
+    if ig is None:
+        raise RuntimeError("igraph is required to compute locality metrics.")
+    if sparse is None:
+        raise RuntimeError("numpy and scipy are required to compute locality metrics.")
 
-    nodes_to_remove = [node for node, kind in entity_kind.items() if kind in ignore_kinds]
-    locality_graph = graph.copy()
-    locality_graph.remove_nodes_from(nodes_to_remove)
-    nodes = list(locality_graph.nodes())
-    node_count = len(nodes)
+    node_count = locality_graph.vcount()
+    nodes = locality_graph.vs["name"] if node_count else []
 
     if node_count == 0:
         return {
             "ignored_entity_kinds": list(ignore_kinds),
+            "approximate": approximate,
             "node_count": 0,
             "one_hop_size": summarize_values([], histogram_bins),
             "two_hop_size": summarize_values([], histogram_bins),
@@ -445,13 +740,34 @@ def compute_locality_metrics(
 
     one_hop_sizes: Dict[str, int] = {}
     two_hop_sizes: Dict[str, int] = {}
-    two_hop_sets: Dict[str, set] = {}
-    for node in nodes:
-        one_hop_sizes[node] = locality_graph.degree(node)
-        lengths = nx.single_source_shortest_path_length(locality_graph, node, cutoff=2)
-        two_hop = {neighbor for neighbor, dist in lengths.items() if 0 < dist <= 2}
-        two_hop_sets[node] = two_hop
-        two_hop_sizes[node] = len(two_hop)
+    degrees = locality_graph.degree()
+    adjacency = build_csr(locality_graph)
+    if approximate:
+        # Sketches cost a few KiB per node instead of O(n) bits: HyperLogLog
+        # registers for the sizes, then MinHash signatures for the overlap
+        # (inclusion-exclusion over HLL estimates is too noisy per pair).
+        sketches = two_hop_sketches(adjacency)
+        block = max(1, JACCARD_BATCH_BYTES // (sketches.shape[1] * 8))
+        estimates = np.concatenate(
+            [hll_estimate(sketches[start:start + block]) for start in range(0, node_count, block)]
+        )
+        del sketches
+        # The closed sketch counts the node itself whenever it has a neighbour.
+        has_neighbors = np.asarray(degrees) > 0
+        reach_sizes = np.clip(np.rint(estimates) - has_neighbors, 0, node_count - 1).astype(np.int64).tolist()
+        # Overlap is scored on closed sets too, so adjacent nodes also share
+        # each other; expect slightly higher averages than the exact open sets.
+        two_hop_bitsets = two_hop_minhashes(adjacency)
+    else:
+        # A + A @ A gives every 1-2 hop neighbourhood in a couple of sparse C calls.
+        reach = two_hop_reach(adjacency)
+        reach_sizes = np.diff(reach.indptr).tolist()
+        two_hop_bitsets = pack_bitsets(reach)
+    positions: Dict[str, int] = {}
+    for idx, node in enumerate(nodes):
+        positions[node] = idx
+        one_hop_sizes[node] = degrees[idx]
+        two_hop_sizes[node] = reach_sizes[idx]
 
     one_hop_list = [one_hop_sizes[node] for node in nodes]
     two_hop_list = [two_hop_sizes[node] for node in nodes]
@@ -470,47 +786,62 @@ def compute_locality_metrics(
     for node in nodes:
         by_type_nodes[entity_kind.get(node, "unknown")].append(node)
 
-    by_type_metrics: Dict[str, Any] = {}
+    def score_overlap(rows: Sequence[int]) -> Dict[str, Any]:
+        return compute_jaccard_summary(rows, two_hop_bitsets, overlap_max_pairs, overlap_seed, approximate)
+
+    # Overlap scoring dominates and its numpy bitset ops release the GIL, so the
+    # overall and per-type summaries run on threads (processes would have to
+    # pickle the bitset matrix) while the size summaries are built here.
+    # Summaries big enough for the numba kernel stay on this thread: the kernel
+    # is already parallel, and numba's default threading layer hangs at exit
+    # once launched from a worker thread.
+    overlap_rows: Dict[Optional[str], Sequence[int]] = {None: range(node_count)}
     for kind, kind_nodes in by_type_nodes.items():
-        kind_one = [one_hop_sizes[node] for node in kind_nodes]
-        kind_two = [two_hop_sizes[node] for node in kind_nodes]
-        kind_coverage = [
-            two_hop_sizes[node] / (node_count - 1) if node_count > 1 else 0.0
-            for node in kind_nodes
-        ]
-        kind_growth = [
-            two_hop_sizes[node] / one_hop_sizes[node]
-            for node in kind_nodes
-            if one_hop_sizes[node] > 0
-        ]
-        by_type_metrics[kind] = {
-            "one_hop_size": summarize_values(kind_one, histogram_bins),
-            "two_hop_size": summarize_values(kind_two, histogram_bins),
-            "two_hop_coverage_ratio": summarize_numeric(kind_coverage),
-            "two_hop_growth_factor": summarize_numeric(kind_growth),
-            "zero_one_hop_nodes": sum(1 for size in kind_one if size == 0),
-            "two_hop_overlap": compute_jaccard_summary(
-                kind_nodes,
-                two_hop_sets,
-                overlap_max_pairs,
-                overlap_seed,
-            ),
+        overlap_rows[kind] = [positions[node] for node in kind_nodes]
+    workers = max(1, min(len(overlap_rows), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {
+            key: pool.submit(score_overlap, rows)
+            for key, rows in overlap_rows.items()
+            if not uses_jaccard_kernel(len(rows), overlap_max_pairs, approximate)
+        }
+        by_type_metrics: Dict[str, Any] = {}
+        for kind, kind_nodes in by_type_nodes.items():
+            kind_one = [one_hop_sizes[node] for node in kind_nodes]
+            kind_two = [two_hop_sizes[node] for node in kind_nodes]
+            kind_coverage = [
+                two_hop_sizes[node] / (node_count - 1) if node_count > 1 else 0.0
+                for node in kind_nodes
+            ]
+            kind_growth = [
+                two_hop_sizes[node] / one_hop_sizes[node]
+                for node in kind_nodes
+                if one_hop_sizes[node] > 0
+            ]
+            by_type_metrics[kind] = {
+                "one_hop_size": summarize_values(kind_one, histogram_bins),
+                "two_hop_size": summarize_values(kind_two, histogram_bins),
+                "two_hop_coverage_ratio": summarize_numeric(kind_coverage),
+                "two_hop_growth_factor": summarize_numeric(kind_growth),
+                "zero_one_hop_nodes": sum(1 for size in kind_one if size == 0),
+            }
+        overlaps = {
+            key: score_overlap(rows) for key, rows in overlap_rows.items() if key not in pending
         }
+    overlaps.update((key, future.result()) for key, future in pending.items())
+    for kind, metrics in by_type_metrics.items():
+        metrics["two_hop_overlap"] = overlaps[kind]
 
     return {
         "ignored_entity_kinds": list(ignore_kinds),
+        "approximate": approximate,
         "node_count": node_count,
         "one_hop_size": summarize_values(one_hop_list, histogram_bins),
         "two_hop_size": summarize_values(two_hop_list, histogram_bins),
         "two_hop_coverage_ratio": summarize_numeric(coverage_list),
         "two_hop_growth_factor": summarize_numeric(growth_list),
         "zero_one_hop_nodes": zero_one_hop_nodes,
-        "two_hop_overlap": compute_jaccard_summary(
-            nodes,
-            two_hop_sets,
-            overlap_max_pairs,
-            overlap_seed,
-        ),
+        "two_hop_overlap": overlaps[None],
         "by_entity_type": by_type_metrics,
     }
 
@@ -560,26 +891,52 @@ def print_overlap_report(name: str, summary: Dict[str, Any]) -> None:
     print(f"{name}: {format_overlap_summary(summary)}")
 
 
-def build_graph(entity_kind: Dict[str, str], relationships: Sequence[Dict[str, Any]]) -> Any:
-    if nx is None:
-        raise RuntimeError("networkx is required to compute graph metrics.")
-    graph = nx.Graph()
-    for node, kind in entity_kind.items():
-        graph.add_node(node, kind=kind)
-    for rel in relationships:
-        src = rel.get("src")
-        dst = rel.get("dst")
-        if not src or not dst:
-            continue
-        if src not in graph:
-            graph.add_node(src, kind=entity_kind.get(src, "unknown"))
-        if dst not in graph:
-            graph.add_node(dst, kind=entity_kind.get(dst, "unknown"))
-        graph.add_edge(src, dst, kind=rel.get("kind"))
+def build_csr(graph: Any) -> Any:
+    """Symmetric boolean CSR adjacency matrix of an undirected igraph graph."""
+    node_count = graph.vcount()
+    edges = np.array(graph.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+    rows = np.concatenate([edges[:, 0], edges[:, 1]])
+    cols = np.concatenate([edges[:, 1], edges[:, 0]])
+    data = np.ones(rows.size, dtype=bool)
+    return sparse.csr_matrix((data, (rows, cols)), shape=(node_count, node_count))
+
+
+def two_hop_reach(adjacency: Any) -> Any:
+    """CSR matrix whose row i holds every node within two hops of i, excluding i."""
+    reach = adjacency + adjacency @ adjacency
+    reach.setdiag(False)
+    reach.eliminate_zeros()
+    return reach
+
+
+def build_graph(
+    entity_kind: Dict[str, str],
+    edges: EdgeTable,
+    ignore_kinds: Sequence[str] = (),
+) -> Any:
+    """Undirected igraph graph of the entities whose kind is not ignored.
+
+    Filtering happens while building, so ignored nodes and their edges are
+    never allocated.
+    """
+    if ig is None:
+        raise RuntimeError("igraph is required to compute graph metrics.")
+    ignored = set(ignore_kinds)
+    kinds = [entity_kind.get(node, "unknown") for node in edges.node_ids]
+    keep = np.array([kind not in ignored for kind in kinds], dtype=bool)
+    new_index = np.cumsum(keep) - 1
+    edge_mask = keep[edges.src] & keep[edges.dst]
+    edge_list = np.column_stack([new_index[edges.src[edge_mask]], new_index[edges.dst[edge_mask]]])
+    graph = ig.Graph(n=int(keep.sum()), edges=edge_list.tolist(), directed=False)
+    keep_list = keep.tolist()
+    graph.vs["name"] = [node for node, kept in zip(edges.node_ids, keep_list) if kept]
+    graph.vs["kind"] = [kind for kind, kept in zip(kinds, keep_list) if kept]
+    # Collapse parallel edges like networkx.Graph did; self-loops are kept.
+    graph.simplify(multiple=True, loops=False)
     return graph
 
 
-def build_entity_index(entities: Sequence[Dict[str, Any]], relationships: Sequence[Dict[str, Any]]) -> Dict[str, str]:
+def build_entity_index(entities: Sequence[Dict[str, Any]], relationships: Sequence[Relationship]) -> Dict[str, str]:
     entity_kind: Dict[str, str] = {}
     for entity in entities:
         entity_id = entity.get("id")
@@ -587,8 +944,8 @@ def build_entity_index(entities: Sequence[Dict[str, Any]], relationships: Sequen
             continue
         entity_kind[entity_id] = select_entity_kind(entity)
     for rel in relationships:
-        for node in (rel.get("src"), rel.get("dst")):
-            if node and node not in entity_kind:
+        for node in (rel.src, rel.dst):
+            if node not in entity_kind:
                 entity_kind[node] = "unknown"
     return entity_kind
 
@@ -599,6 +956,7 @@ def build_report(
     ignore_kinds: Sequence[str],
     overlap_max_pairs: int,
     overlap_seed: int,
+    approximate_locality: bool = False,
 ) -> Dict[str, Any]:
     raw = load_json(path)
     world_data = raw.get("worldData") if isinstance(raw, dict) and "worldData" in raw else raw
@@ -606,26 +964,29 @@ def build_report(
         raise ValueError("Unexpected world data format.")
 
     entities = extract_entities(world_data)
-    relationships, relationships_source = extract_relationships(world_data, entities)
+    relationships, relationships_source, relationship_count = extract_relationships(world_data, entities)
     entity_kind = build_entity_index(entities, relationships)
 
-    graph = build_graph(entity_kind, relationships)
-    connection_metrics = compute_connection_metrics(entity_kind, relationships, histogram_bins)
-    cluster_metrics = compute_cluster_metrics(graph, entity_kind, ignore_kinds)
+    edges = factorize_relationships(entity_kind, relationships)
+    # Cluster and locality metrics share one filtered graph; neither mutates it.
+    filtered_graph = build_graph(entity_kind, edges, ignore_kinds)
+    connection_metrics = compute_connection_metrics(entity_kind, edges, histogram_bins)
+    cluster_metrics = compute_cluster_metrics(filtered_graph, ignore_kinds)
     locality_metrics = compute_locality_metrics(
-        graph,
+        filtered_graph,
         entity_kind,
         ignore_kinds,
         histogram_bins,
         overlap_max_pairs,
         overlap_seed,
+        approximate_locality,
     )
 
     return {
         "input_path": path,
         "relationships_source": relationships_source,
         "entity_count": len(entity_kind),
-        "relationship_count": len(relationships),
+        "relationship_count": relationship_count,
         "entity_type_counts": Counter(entity_kind.values()),
         "connection_metrics": connection_metrics,
         "cluster_metrics": cluster_metrics,
@@ -633,6 +994,28 @@ def build_report(
     }
 
 
+def dump_report(report: Dict[str, Any]) -> bytes:
+    """Serialize the report as indented, key-sorted JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(
+            report,
+            default=str,
+            option=orjson.OPT_INDENT_2
+            | orjson.OPT_SORT_KEYS
+            | orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_SERIALIZE_NUMPY,
+        )
+    return json.dumps(report, indent=2, sort_keys=True, default=str).encode("utf-8")
+
+
+def write_report(path: str, payload: bytes) -> None:
+    """Write payload beside path and rename it into place, so readers never see a partial report."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(payload)
+    os.replace(tmp_path, path)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Analyze worldData knowledge graph metrics.")
     parser.add_argument("world_data", help="Path to worldData.json")
@@ -659,6 +1042,11 @@ def main() -> int:
         default=13,
         help="Random seed for overlap sampling.",
     )
+    parser.add_argument(
+        "--approximate-locality",
+        action="store_true",
+        help="Estimate 2-hop sizes (HyperLogLog) and overlap (MinHash) from sketches (bounded memory for huge graphs).",
+    )
     parser.add_argument(
         "--json",
         dest="json_output",
@@ -672,8 +1060,12 @@ def main() -> int:
     )
     args = parser.parse_args()
 
-    if nx is None:
-        print("Missing dependency: networkx. Install via `pip install networkx`.", file=sys.stderr)
+    missing = [name for name, module in (("igraph", ig), ("numpy", np), ("scipy", sparse)) if module is None]
+    if missing:
+        print(
+            f"Missing dependency: {', '.join(missing)}. Install via `pip install {' '.join(missing)}`.",
+            file=sys.stderr,
+        )
         return 1
 
     ignore_kinds = [] if args.include_era else ["era"]
@@ -683,16 +1075,15 @@ def main() -> int:
         ignore_kinds,
         args.overlap_max_pairs,
         args.overlap_seed,
+        args.approximate_locality,
     )
 
     if args.json_out:
-        with open(args.json_out, "w", encoding="utf-8") as handle:
-            json.dump(report, handle, indent=2, sort_keys=True, default=str)
+        write_report(args.json_out, dump_report(report))
         return 0
 
     if args.json_output:
-        json.dump(report, sys.stdout, indent=2, sort_keys=True, default=str)
-        print()
+        sys.stdout.buffer.write(dump_report(report) + b"\n")
         return 0
 
     print("Graph summary")
@@ -717,6 +1108,8 @@ def main() -> int:
     locality = report["locality_metrics"]
     print("\nLocality metrics (1-2 hops, era excluded)" if ignore_kinds else "\nLocality metrics (1-2 hops, era included)")
     print(f"- nodes: {locality['node_count']}")
+    if locality["approximate"]:
+        print("- 2-hop sizes are HyperLogLog estimates; overlap is a MinHash estimate over closed 2-hop sets")
     print(f"- zero 1-hop nodes: {locality['zero_one_hop_nodes']}")
     print_connection_report("1-hop neighborhood size", locality["one_hop_size"])
     print_connection_report("2-hop neighborhood size", locality["two_hop_size"])
@@ -2,8 +2,8 @@
 """
 Verify that an entity rename was fully propagated through a bundle.json.
 
-Reads the bundle as raw text, finds every occurrence of the old name
-(case-insensitive), and resolves each hit to a JSON key path so you
+Memory-maps the bundle as raw bytes, finds every occurrence of the old
+name (case-insensitive), and resolves each hit to a JSON key path so you
 can see exactly which field still contains the old name.
 
 Usage:
@@ -12,56 +12,131 @@ Usage:
         (also checks individual words from the name)
 """
 
+import mmap
 import sys
 import re
+from bisect import bisect_right
+from itertools import accumulate
 
+# One JSON token: a whole string (escapes skipped, unterminated strings run to
+# EOF) or a structural character. Everything between tokens is whitespace,
+# numbers, true/false/null, none of which affect the key path.
+JSON_TOKEN_RE = re.compile(
+    rb'"(?P<string>[^"\\]*(?:\\.[^"\\]*)*\\?)(?:"|\Z)|[{}\[\]:,]',
+    re.DOTALL,
+)
 
-def find_all_occurrences(text, needle):
-    """Case-insensitive search for all occurrences."""
-    results = []
-    lower_text = text.lower()
-    lower_needle = needle.lower()
-    start = 0
-    while True:
-        idx = lower_text.find(lower_needle, start)
-        if idx == -1:
-            break
-        results.append((idx, idx + len(needle)))
-        start = idx + 1
+# Bytes lowercased at a time while searching; bounds the search's extra memory.
+SEARCH_CHUNK_BYTES = 1 << 22
+
+
+def read_bundle(path):
+    """Map the bundle read-only; searching and path walking work on the bytes in place."""
+    with open(path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b''  # empty files cannot be mapped
+
+
+def case_insensitive_pattern(needle):
+    """Bytes regex for needle that also folds case of non-ASCII letters (overlapping hits)."""
+    parts = []
+    for ch in needle:
+        variants = sorted({v.encode('utf-8') for v in (ch, ch.lower(), ch.upper()) if len(v) == 1})
+        if len(variants) == 1:
+            parts.append(re.escape(variants[0]))
+        else:
+            parts.append(b'(?:' + b'|'.join(re.escape(v) for v in variants) + b')')
+    return re.compile(b'(?=(' + b''.join(parts) + b'))', re.IGNORECASE)
+
+
+def find_all_occurrences(data, needles):
+    """
+    Case-insensitive search for every needle, as one list of (start, end)
+    byte offsets into data per needle.
+
+    ASCII-folding needles share a single pass that lowercases data one
+    window at a time, so no lowercased copy of the whole bundle is held.
+    bytes.lower() only folds ASCII, so needles with non-ASCII letters go
+    through case_insensitive_pattern instead.
+    """
+    results = [[] for _ in needles]
+    plain = []
+    for i, needle in enumerate(needles):
+        if any(not ch.isascii() and ch.lower() != ch.upper() for ch in needle):
+            results[i] = [(m.start(), m.end(1)) for m in case_insensitive_pattern(needle).finditer(data)]
+        else:
+            plain.append((i, needle.encode('utf-8').lower()))
+    if not plain:
+        return results
+
+    # Windows overlap by the longest needle so hits straddling a boundary are
+    # seen; each hit is kept only by the window it starts in.
+    overlap = max(0, max(len(lower_needle) for _, lower_needle in plain) - 1)
+    size = len(data)
+    for base in range(0, max(size, 1), SEARCH_CHUNK_BYTES):
+        window = data[base:base + SEARCH_CHUNK_BYTES + overlap].lower()
+        last = base + SEARCH_CHUNK_BYTES >= size
+        for i, lower_needle in plain:
+            hits = results[i]
+            idx = window.find(lower_needle)
+            while idx != -1 and (idx < SEARCH_CHUNK_BYTES or last):
+                hits.append((base + idx, base + idx + len(lower_needle)))
+                idx = window.find(lower_needle, idx + 1)
     return results
 
 
-def resolve_json_path(raw, offset):
+def context(data, start, end, width):
+    """Up to width characters either side of a hit, decoded, with newlines flattened."""
+    # A UTF-8 character is at most 4 bytes; 'ignore' drops the cut partial one.
+    before = data[max(0, start - 4 * width - 3):start].decode('utf-8', 'ignore')[-width:]
+    after = data[end:end + 4 * width + 3].decode('utf-8', 'ignore')[:width]
+    match_text = data[start:end].decode('utf-8', 'replace')
+    return before.replace('\n', ' '), match_text, after.replace('\n', ' ')
+
+
+def format_json_path(depth_stack, array_indices, current_key):
+    """Render the walker state as a dotted key path."""
+    parts = []
+    for idx, (container_type, label) in enumerate(depth_stack):
+        parts.append(label)
+        d = idx + 1
+        if d in array_indices:
+            parts.append(f'[{array_indices[d]}]')
+    if current_key:
+        parts.append(current_key)
+
+    return '.'.join(parts) if parts else '$'
+
+
+def resolve_json_paths(raw, offsets):
     """
-    Given a character offset into raw JSON, reconstruct the JSON key path
-    by walking from the start and tracking nesting.
+    Given byte offsets into raw JSON, reconstruct the JSON key path of
+    each one in a single walk from the start, tracking nesting.
+
+    Returns a dict mapping each offset to its path.
     """
+    pending = sorted(set(offsets))
+    paths = {}
+    next_idx = 0
+
     depth_stack = []  # stack of (container_type, key_or_label)
-    i = 0
     current_key = None
     expecting_value = False
     array_indices = {}  # depth -> current index
 
-    while i < offset:
-        c = raw[i]
-
-        # Skip whitespace
-        if c in ' \t\n\r':
-            i += 1
-            continue
-
-        # Strings
-        if c == '"':
-            end = i + 1
-            while end < len(raw):
-                if raw[end] == '\\':
-                    end += 2
-                    continue
-                if raw[end] == '"':
-                    break
-                end += 1
-            string_val = raw[i + 1:end]
+    for match in JSON_TOKEN_RE.finditer(raw):
+        # Every offset the walk has reached sees the state built so far.
+        i = match.start()
+        while next_idx < len(pending) and pending[next_idx] <= i:
+            paths[pending[next_idx]] = format_json_path(depth_stack, array_indices, current_key)
+            next_idx += 1
+        if next_idx == len(pending):
+            break
 
+        string_val = match.group('string')
+        if string_val is not None:
             if expecting_value:
                 # This string is a value — consume it
                 expecting_value = False
@@ -72,74 +147,60 @@ def resolve_json_path(raw, offset):
                     # Inside an array — this is an element, not a key
                     pass
                 else:
-                    current_key = string_val
-            i = end + 1
+                    current_key = string_val.decode('utf-8', 'replace')
             continue
 
-        if c == ':':
+        c = match.group()
+
+        if c == b':':
             expecting_value = True
-            i += 1
             continue
 
-        if c == '{':
+        if c == b'{':
             label = current_key if current_key is not None else '$'
             depth_stack.append(('object', label))
             current_key = None
             expecting_value = False
-            i += 1
             continue
 
-        if c == '}':
+        if c == b'}':
             if depth_stack:
                 depth_stack.pop()
             d = len(depth_stack)
             if d in array_indices:
                 pass  # closing an object inside an array
-            i += 1
             continue
 
-        if c == '[':
+        if c == b'[':
             label = current_key if current_key is not None else '$'
             depth_stack.append(('array', label))
             d = len(depth_stack)
             array_indices[d] = 0
             current_key = None
             expecting_value = False
-            i += 1
             continue
 
-        if c == ']':
+        if c == b']':
             d = len(depth_stack)
             if d in array_indices:
                 del array_indices[d]
             if depth_stack:
                 depth_stack.pop()
-            i += 1
             continue
 
-        if c == ',':
+        if c == b',':
             d = len(depth_stack)
             if d in array_indices:
                 array_indices[d] += 1
             current_key = None
             expecting_value = False
-            i += 1
             continue
 
-        # Numbers, booleans, null — skip
-        i += 1
+    # Offsets past the last token see the final state
+    for offset in pending[next_idx:]:
+        paths[offset] = format_json_path(depth_stack, array_indices, current_key)
 
-    # Build path from stack
-    parts = []
-    for idx, (container_type, label) in enumerate(depth_stack):
-        parts.append(label)
-        d = idx + 1
-        if d in array_indices:
-            parts.append(f'[{array_indices[d]}]')
-    if current_key:
-        parts.append(current_key)
-
-    return '.'.join(parts) if parts else '$'
+    return paths
 
 
 def main():
@@ -151,31 +212,12 @@ def main():
     old_name = sys.argv[2]
     check_partials = '--partials' in sys.argv
 
-    with open(bundle_path, 'r', encoding='utf-8') as f:
-        raw = f.read()
-
-    print(f'Searching {len(raw):,} chars for "{old_name}"...\n')
-
-    # Full name search
-    occurrences = find_all_occurrences(raw, old_name)
+    raw = read_bundle(bundle_path)
 
-    if not occurrences:
-        print(f'  No occurrences of full name "{old_name}" found.')
-    else:
-        print(f'  {len(occurrences)} occurrence(s) of full name "{old_name}":\n')
-        for start, end in occurrences:
-            path = resolve_json_path(raw, start)
-            ctx_start = max(0, start - 60)
-            ctx_end = min(len(raw), end + 60)
-            before = raw[ctx_start:start].replace('\n', ' ')
-            match_text = raw[start:end]
-            after = raw[end:ctx_end].replace('\n', ' ')
-
-            print(f'    Path:    {path}')
-            print(f'    Context: ...{before}>>>{match_text}<<<{after}...')
-            print()
+    print(f'Searching {len(raw):,} bytes for "{old_name}"...\n')
 
     # Partial name search (individual words, excluding stop words)
+    words = []
     if check_partials:
         stop_words = {
             'the', 'a', 'an', 'of', 'in', 'on', 'at', 'to', 'for', 'and',
@@ -185,41 +227,69 @@ def main():
         words = re.split(r'[^a-zA-Z0-9]+', old_name)
         words = [w for w in words if w and len(w) >= 3 and w.lower() not in stop_words]
 
-        if words:
-            print(f'  --- Partial word check ({", ".join(words)}) ---\n')
-            # Collect full-match positions to exclude
-            full_positions = set()
-            for start, end in occurrences:
-                for p in range(start, end):
-                    full_positions.add(p)
-
-            for word in words:
-                partials = find_all_occurrences(raw, word)
-                # Exclude positions covered by full matches
-                partials = [(s, e) for s, e in partials
-                            if not any(p in full_positions for p in range(s, e))]
-                if not partials:
+    # The full name and every partial word are found in one pass
+    found = find_all_occurrences(raw, [old_name] + words)
+    occurrences = found[0]
+
+    partials_by_word = []
+    if words:
+        # With starts sorted and ends as a running max, the first full
+        # match whose running end passes s is the only overlap candidate.
+        full_starts = [start for start, _ in occurrences]
+        full_ends = list(accumulate((end for _, end in occurrences), max))
+
+        for word, partials in zip(words, found[1:]):
+            # Exclude positions covered by full matches
+            kept = []
+            for s, e in partials:
+                idx = bisect_right(full_ends, s)
+                if idx < len(full_starts) and full_starts[idx] < e:
                     continue
-                print(f'    "{word}": {len(partials)} standalone occurrence(s)')
-                for start, end in partials[:10]:  # cap at 10 per word
-                    path = resolve_json_path(raw, start)
-                    ctx_start = max(0, start - 40)
-                    ctx_end = min(len(raw), end + 40)
-                    before = raw[ctx_start:start].replace('\n', ' ')
-                    match_text = raw[start:end]
-                    after = raw[end:ctx_end].replace('\n', ' ')
-                    print(f'      Path:    {path}')
-                    print(f'      Context: ...{before}>>>{match_text}<<<{after}...')
-                if len(partials) > 10:
-                    print(f'      ... and {len(partials) - 10} more')
-                print()
+                kept.append((s, e))
+            partials_by_word.append((word, kept))
+
+    # Resolve every reported hit in one walk over the bundle
+    offsets = [start for start, _ in occurrences]
+    for _, partials in partials_by_word:
+        offsets.extend(start for start, _ in partials[:10])  # cap at 10 per word
+    paths = resolve_json_paths(raw, offsets)
+
+    # Results are gathered and written once rather than printed line by line
+    out = []
+    if not occurrences:
+        out.append(f'  No occurrences of full name "{old_name}" found.')
+    else:
+        out.append(f'  {len(occurrences)} occurrence(s) of full name "{old_name}":\n')
+        for start, end in occurrences:
+            path = paths[start]
+            before, match_text, after = context(raw, start, end, 60)
+
+            out.append(f'    Path:    {path}')
+            out.append(f'    Context: ...{before}>>>{match_text}<<<{after}...')
+            out.append('')
+
+    if words:
+        out.append(f'  --- Partial word check ({", ".join(words)}) ---\n')
+        for word, partials in partials_by_word:
+            if not partials:
+                continue
+            out.append(f'    "{word}": {len(partials)} standalone occurrence(s)')
+            for start, end in partials[:10]:  # cap at 10 per word
+                path = paths[start]
+                before, match_text, after = context(raw, start, end, 40)
+                out.append(f'      Path:    {path}')
+                out.append(f'      Context: ...{before}>>>{match_text}<<<{after}...')
+            if len(partials) > 10:
+                out.append(f'      ... and {len(partials) - 10} more')
+            out.append('')
 
     # Summary
     total = len(occurrences)
     if total == 0:
-        print('Result: CLEAN — no remaining references to the old name.')
+        out.append('Result: CLEAN — no remaining references to the old name.')
     else:
-        print(f'Result: {total} remaining reference(s) found. Review paths above.')
+        out.append(f'Result: {total} remaining reference(s) found. Review paths above.')
+    sys.stdout.write('\n'.join(out) + '\n')
 
 
 if __name__ == '__main__':